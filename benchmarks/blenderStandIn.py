@@ -0,0 +1,397 @@
+"""Minimal stand-in for bpy, bmesh, mathutils and gpu.
+
+Only implements what nightzMapExporter touches while exporting, and what
+nightsMappingTools needs to register, so both can be imported and driven
+with plain python. Call install() before importing them.
+"""
+import math
+import os
+import sys
+import types
+
+
+class Vector:
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        self.values = tuple(values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class Euler(Vector):
+    __slots__ = ()
+
+
+class Quaternion:
+    """Only remembers the euler angles it was made from"""
+    __slots__ = ('euler',)
+
+    def __init__(self, euler):
+        self.euler = euler
+
+    def to_euler(self, order):
+        assert order == 'XYZ', 'Stand-in only supports XYZ eulers'
+        return self.euler
+
+
+class Matrix:
+    __slots__ = ('rows', 'components')
+
+    def __init__(self, rows, components=None):
+        self.rows = [ tuple(row) for row in rows ]
+        self.components = components
+
+    @classmethod
+    def LocRotScale(cls, location, euler, scale):
+        """World matrix of an object, R = Rz * Ry * Rx as for XYZ eulers"""
+        cx, sx = math.cos(euler[0]), math.sin(euler[0])
+        cy, sy = math.cos(euler[1]), math.sin(euler[1])
+        cz, sz = math.cos(euler[2]), math.sin(euler[2])
+        rotation = [ (cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx),
+                     (sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx),
+                     (-sy, cy * sx, cy * cx) ]
+        rows = [ tuple(rotation[i][j] * scale[j] for j in range(3)) + (location[i],) for i in range(3) ]
+        rows.append((0.0, 0.0, 0.0, 1.0))
+        return cls(rows, (Vector(location), Quaternion(Euler(euler)), Vector(scale)))
+
+    def decompose(self):
+        assert self.components is not None, 'Stand-in can only decompose LocRotScale matrices'
+        return self.components
+
+    @classmethod
+    def Translation(cls, offset):
+        return cls([ (1.0, 0.0, 0.0, offset[0]),
+                     (0.0, 1.0, 0.0, offset[1]),
+                     (0.0, 0.0, 1.0, offset[2]),
+                     (0.0, 0.0, 0.0, 1.0) ])
+
+    # Blender 2.7x multiplies matrices and vectors with '*'.
+    def __mul__(self, vector):
+        return Vector(sum(row[i] * vector[i] for i in range(4)) for row in self.rows)
+
+
+def Property(**kwargs):
+    # Operators read their properties' defaults until something sets them.
+    return kwargs.get('default')
+
+
+class Operator:
+    pass
+
+
+class Panel:
+    pass
+
+
+class WindowManager:
+    pass
+
+
+class Menu:
+    def __init__(self):
+        self.funcs = []
+
+    def append(self, func):
+        self.funcs.append(func)
+
+    def remove(self, func):
+        self.funcs.remove(func)
+
+
+class ImagePreview:
+    def __init__(self, icon_id):
+        self.icon_id = icon_id
+
+
+class ImagePreviewCollection(dict):
+    def load(self, name, filepath, filetype):
+        if not os.path.isfile(filepath):
+            raise FileNotFoundError(filepath)
+        self[name] = ImagePreview(len(self) + 1)
+
+    def close(self):
+        self.clear()
+
+
+class Image:
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.library = None
+
+
+class Texture:
+    def __init__(self, image, name=None):
+        self.name = name
+        self.image = image
+
+
+class TextureSlot:
+    def __init__(self, texture):
+        self.texture = texture
+        self.use_map_alpha = False
+
+
+class TextureSlots(list):
+    def add(self):
+        self.append(TextureSlot(None))
+
+
+class Material:
+    def __init__(self, name, texturePath=None):
+        self.name = name
+        self.texture_slots = TextureSlots()
+        if texturePath is not None:
+            self.texture_slots.append(TextureSlot(Texture(Image(texturePath))))
+        self.use_transparency = False
+
+
+class DataCollection(list):
+    """bpy.data.materials and friends: a list with lookup by name"""
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.is_updated = False
+
+    def get(self, name):
+        for item in self:
+            if item.name == name:
+                return item
+        return None
+
+    def new(self, name, *args):
+        item = self.factory(name, *args)
+        self.append(item)
+        return item
+
+    def remove(self, item):
+        super().remove(item)
+        item.__class__ = RemovedID
+
+
+class RemovedID:
+    """What python references to removed datablocks turn into"""
+    def __getattribute__(self, name):
+        raise ReferenceError("StructRNA has been removed")
+
+
+class ImageCollection(list):
+    def load(self, filepath):
+        image = Image(filepath)
+        self.append(image)
+        return image
+
+
+class MeshLoop:
+    __slots__ = ('vertex_index',)
+
+    def __init__(self, vertexIndex):
+        self.vertex_index = vertexIndex
+
+
+class MeshPolygon:
+    __slots__ = ('vertices', 'material_index')
+
+    def __init__(self, vertices, materialIndex):
+        self.vertices = vertices
+        self.material_index = materialIndex
+
+
+class UVLoop:
+    __slots__ = ('uv',)
+
+    def __init__(self, uv):
+        self.uv = uv
+
+
+class UVLayer:
+    def __init__(self, data):
+        self.data = data
+
+
+class UVLayers:
+    def __init__(self, active):
+        self.active = active
+
+    def __len__(self):
+        return 1
+
+
+class MeshVertex:
+    __slots__ = ('co',)
+
+    def __init__(self, co):
+        self.co = co
+
+
+class Mesh:
+    def __init__(self, vertices, polygons, uvs, materials):
+        self.vertices = [ MeshVertex(co) for co in vertices ]
+        self.polygons = polygons
+        self.loops = [ MeshLoop(index) for poly in polygons for index in poly.vertices ]
+        self.uv_layers = UVLayers(UVLayer([ UVLoop(uv) for uv in uvs ]))
+        self.materials = materials
+
+    def update(self):
+        pass
+
+    def calc_tangents(self):
+        pass
+
+
+class Lamp:
+    def __init__(self, type, color, energy, distance):
+        self.type = type
+        self.color = color
+        self.energy = energy
+        self.distance = distance
+
+
+class Object:
+    def __init__(self, name, data, matrix_world, type='MESH', properties=None):
+        self.name = name
+        self.type = type
+        self.data = data
+        self.matrix_world = matrix_world
+        self.select = True
+        self.empty_draw_type = 'PLAIN_AXES'
+        self.properties = properties or {}
+
+    # Custom properties.
+    def keys(self):
+        return self.properties.keys()
+
+    def __getitem__(self, key):
+        return self.properties[key]
+
+
+class BMLoop:
+    __slots__ = ('index',)
+
+    def __init__(self, index):
+        self.index = index
+
+
+class BMFace:
+    __slots__ = ('loops', 'material_index', 'select', 'layers')
+
+    def __init__(self, loops, materialIndex):
+        self.loops = loops
+        self.material_index = materialIndex
+        self.select = False
+        self.layers = {}
+
+    def __getitem__(self, layer):
+        return self.layers.get(layer, 0)
+
+    def __setitem__(self, layer, value):
+        self.layers[layer] = value
+
+
+class BMVert:
+    __slots__ = ('co',)
+
+    def __init__(self, co):
+        self.co = co
+
+
+class BMLayerCollection:
+    def __init__(self):
+        self.layers = {}
+
+    def get(self, name):
+        return self.layers.get(name)
+
+    def new(self, name):
+        self.layers[name] = name
+        return name
+
+
+class BMLayerAccess:
+    def __init__(self):
+        self.int = BMLayerCollection()
+
+
+class BMSequence(list):
+    def __init__(self, items=()):
+        super().__init__(items)
+        self.layers = BMLayerAccess()
+
+    def ensure_lookup_table(self):
+        pass
+
+
+class BMesh:
+    def __init__(self):
+        self.verts = BMSequence()
+        self.faces = BMSequence()
+
+    def from_mesh(self, mesh):
+        self.verts = BMSequence(BMVert(v.co) for v in mesh.vertices)
+        self.faces = BMSequence()
+        loopIndex = 0
+        for poly in mesh.polygons:
+            loops = [ BMLoop(loopIndex + i) for i in range(len(poly.vertices)) ]
+            self.faces.append(BMFace(loops, poly.material_index))
+            loopIndex += len(poly.vertices)
+
+
+# Open preview collections, so leaks show up in tests.
+previewCollections = []
+
+def newPreviews():
+    collection = ImagePreviewCollection()
+    previewCollections.append(collection)
+    return collection
+
+def removePreviews(collection):
+    previewCollections.remove(collection)
+    collection.close()
+
+def makeModule(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+def makeData():
+    return types.SimpleNamespace(materials=DataCollection(Material),
+                                 textures=DataCollection(lambda name, type: Texture(None, name)),
+                                 images=ImageCollection())
+
+def install():
+    """Register the stand-in modules in sys.modules and return the bpy one"""
+    handlers = makeModule("bpy.app.handlers",
+                          persistent=lambda func: func,
+                          scene_update_post=[])
+    app = makeModule("bpy.app", handlers=handlers, version_string="stand-in")
+    bpyTypes = makeModule("bpy.types",
+                          Operator=Operator,
+                          Panel=Panel,
+                          WindowManager=WindowManager,
+                          INFO_MT_file_export=Menu())
+    props = makeModule("bpy.props",
+                       StringProperty=Property,
+                       BoolProperty=Property,
+                       IntProperty=Property,
+                       FloatProperty=Property,
+                       EnumProperty=Property)
+    previews = makeModule("bpy.utils.previews", new=newPreviews, remove=removePreviews)
+    utils = makeModule("bpy.utils",
+                       previews=previews,
+                       register_class=lambda cls: None,
+                       unregister_class=lambda cls: None)
+    path = makeModule("bpy.path", abspath=lambda filepath, library=None: filepath)
+    context = types.SimpleNamespace(selected_objects=[], window_manager=WindowManager())
+    bpy = makeModule("bpy", app=app, types=bpyTypes, props=props, utils=utils, path=path,
+                     context=context, data=makeData())
+    bpy.__all__ = []
+
+    makeModule("bmesh", new=BMesh)
+    makeModule("mathutils", Vector=Vector, Matrix=Matrix, Euler=Euler, Quaternion=Quaternion)
+    makeModule("gpu")
+    return bpy
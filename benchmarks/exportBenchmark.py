@@ -0,0 +1,235 @@
+"""Synthetic-scene benchmark for nightzMapExporter.
+
+Runs ExportMap.execute() with plain python on generated grid meshes, using
+the bpy stand-in from blenderStandIn.py, and reports faces per second and
+peak Python memory for each export mode:
+
+    python benchmarks/exportBenchmark.py --faces 100000
+    python benchmarks/exportBenchmark.py --save-baseline baseline.json
+    python benchmarks/exportBenchmark.py --baseline baseline.json --tolerance 0.25
+
+Exits with status 1 if a mode got slower (or hungrier) than the baseline
+by more than the tolerance.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import blenderStandIn
+bpy = blenderStandIn.install()
+import nightzMapExporter
+import nightzMapReader
+
+# Export mode name -> ExportMap properties.
+EXPORT_MODES = {
+    "copyTextures" : { "copyTextures" : True, "writeProfile" : False },
+    "noTextureCopy" : { "copyTextures" : False, "writeProfile" : False },
+    "profiled" : { "copyTextures" : True, "writeProfile" : True },
+    "profiledTraced" : { "copyTextures" : True, "writeProfile" : True, "traceMemory" : True },
+    "chunked" : { "copyTextures" : False, "writeProfile" : False, "chunkedFormat" : True },
+}
+
+
+def makeGridObject(name, gridSize, offset, materials):
+    """Build a gridSize x gridSize quad grid cycling through materials"""
+    vertices = []
+    uvs = []
+    for y in range(gridSize + 1):
+        for x in range(gridSize + 1):
+            vertices.append((float(x), float(y), math.sin(x * 0.1) * math.cos(y * 0.1)))
+            uvs.append((x / gridSize, y / gridSize))
+
+    polygons = []
+    rowSize = gridSize + 1
+    for y in range(gridSize):
+        for x in range(gridSize):
+            first = y * rowSize + x
+            quad = (first, first + 1, first + rowSize + 1, first + rowSize)
+            polygons.append(blenderStandIn.MeshPolygon(quad, (x + y) % len(materials)))
+
+    mesh = blenderStandIn.Mesh(vertices, polygons, uvs, materials)
+    matrix = blenderStandIn.Matrix.Translation(offset)
+    return blenderStandIn.Object(name, mesh, matrix)
+
+def makeEntityObjects(entityCount, extent):
+    """Empties and lamps spread over the meshes, with custom properties"""
+    entities = []
+    for i in range(entityCount):
+        location = ((i * 7.3) % extent, (i * 3.1) % extent - extent * 0.5, (i % 5) * 1.5)
+        euler = (0.1 * (i % 7), 0.2 * (i % 3), 0.3 * (i % 11))
+        matrix = blenderStandIn.Matrix.LocRotScale(location, euler, (1.0, 1.0 + i % 2, 1.0))
+        if i % 4 == 0:
+            lamp = blenderStandIn.Lamp('POINT', (1.0, 0.5, 0.25), 2.0, 25.0)
+            entities.append(blenderStandIn.Object("Lamp{}".format(i), lamp, matrix, 'LAMP'))
+        else:
+            properties = { "spawnGroup" : i % 3, "_RNA_UI" : {} }
+            entities.append(blenderStandIn.Object("Spawn{}".format(i), None, matrix, 'EMPTY', properties))
+
+    return entities
+
+def checkEntities(loadedMap, entityObjects, cellSize):
+    """Raise AssertionError unless entities and their grid match the scene"""
+    entities = loadedMap["entities"]
+    assert len(entities) == len(entityObjects), 'Expected {} entities'.format(len(entityObjects))
+
+    for entity, obj in zip(entities, entityObjects):
+        location, rotation, scale = obj.matrix_world.decompose()
+        euler = rotation.to_euler('XYZ')
+        assert entity["name"] == obj.name and entity["type"] == obj.type
+        assert entity["position"] == [ location[0], -location[1], location[2] ], 'Position not y-flipped'
+        assert entity["rotation"] == [ -euler[0], euler[1], -euler[2] ], 'Rotation not y-flipped'
+        assert "_RNA_UI" not in entity["properties"]
+        if obj.type == 'LAMP':
+            assert entity["subtype"] == obj.data.type and entity["energy"] == obj.data.energy
+
+    grid = loadedMap["entityGrid"]
+    assert grid["cellSize"] == cellSize
+    indexedIds = sorted(x for ids in grid["cells"].values() for x in ids)
+    assert indexedIds == list(range(len(entities))), 'Every entity must be in exactly one cell'
+    for entity in entities:
+        cell = ",".join(str(int(math.floor(x / cellSize))) for x in entity["position"])
+        assert entity["id"] in grid["cells"][cell], 'Entity {} in the wrong cell'.format(entity["id"])
+
+def checkChunks(header, operator):
+    """Raise AssertionError unless geometry chunks stay within the configured sizes"""
+    assert header["chunkVertices"] == operator.chunkVertices and header["chunkFaces"] == operator.chunkFaces
+    for objectInfo in header["objects"]:
+        assert objectInfo["numVerticesChunks"] == math.ceil(objectInfo["numVertices"] / operator.chunkVertices)
+        assert objectInfo["numFacesChunks"] == math.ceil(objectInfo["numFaces"] / operator.chunkFaces)
+
+def checkProfile(operator):
+    """Raise AssertionError unless the profile sidecar says how memory was measured"""
+    mapPath = Path(operator.filepath)
+    with (mapPath.parents[0] / (mapPath.stem + '.profile.json')).open() as filePtr:
+        report = json.load(filePtr)
+
+    expectedMethod = "tracemalloc" if operator.traceMemory else "ru_maxrss"
+    assert report["peakMemoryMethod"] == expectedMethod, 'Peak memory measured with {}'.format(report["peakMemoryMethod"])
+    assert report["peakMemory"] > 0
+
+def makeScene(faceCount, objectCount, materialCount, entityCount, textureDir):
+    materials = []
+    for i in range(materialCount):
+        texturePath = textureDir / "texture{}.png".format(i)
+        texturePath.write_bytes(os.urandom(4096))
+        materials.append(blenderStandIn.Material("Material{}".format(i), str(texturePath)))
+
+    gridSize = max(1, int(math.sqrt(faceCount / objectCount)))
+    meshes = [ makeGridObject("Grid{}".format(i), gridSize, (i * (gridSize + 1), 0.0, 0.0), materials)
+               for i in range(objectCount) ]
+    return meshes + makeEntityObjects(entityCount, objectCount * (gridSize + 1))
+
+def runExport(name, properties, outputDir):
+    operator = nightzMapExporter.ExportMap()
+    operator.filepath = str(outputDir / "{}.json".format(name))
+    for key, value in properties.items():
+        setattr(operator, key, value)
+
+    startTime = time.perf_counter()
+    operator.execute(bpy.context)
+    return operator, time.perf_counter() - startTime
+
+def runMode(name, properties, outputDir, repeat):
+    # Time untraced runs, tracemalloc would dominate the timings.
+    bestTime = min(runExport(name, properties, outputDir)[1] for run in range(repeat))
+
+    tracemalloc.start()
+    operator = runExport(name, properties, outputDir)[0]
+    peakMemory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # Make sure the exporter still writes valid maps.
+    if operator.chunkedFormat:
+        with nightzMapReader.MapContainer(str(Path(operator.filepath).with_suffix(".nzmap"))) as container:
+            loadedMap = container.loadMap()
+            checkChunks(container.readHeader(), operator)
+    else:
+        with open(operator.filepath) as filePtr:
+            loadedMap = json.load(filePtr)
+
+    if operator.writeProfile:
+        checkProfile(operator)
+
+    faceCount = len(loadedMap["faces"])
+    entityObjects = [x for x in bpy.context.selected_objects if x.type != 'MESH']
+    checkEntities(loadedMap, entityObjects, operator.entityCellSize)
+
+    return {
+        "faces" : faceCount,
+        "seconds" : bestTime,
+        "facesPerSecond" : faceCount / bestTime,
+        "peakMemory" : peakMemory,
+    }
+
+def findRegressions(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        expected = baseline[name]
+        if result["facesPerSecond"] < expected["facesPerSecond"] * (1.0 - tolerance):
+            regressions.append("{}: {:.0f} faces/s, baseline {:.0f}".format(
+                name, result["facesPerSecond"], expected["facesPerSecond"]))
+        if result["peakMemory"] > expected["peakMemory"] * (1.0 + tolerance):
+            regressions.append("{}: {} bytes peak, baseline {}".format(
+                name, result["peakMemory"], expected["peakMemory"]))
+
+    return regressions
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark nightzMapExporter on synthetic scenes")
+    parser.add_argument("--faces", type=int, default=20000, help="Approximate number of faces to export")
+    parser.add_argument("--objects", type=int, default=4, help="Number of mesh objects")
+    parser.add_argument("--materials", type=int, default=16, help="Number of materials")
+    parser.add_argument("--entities", type=int, default=256, help="Number of empties and lamps")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per mode, the fastest one is kept")
+    parser.add_argument("--mode", action="append", choices=sorted(EXPORT_MODES),
+                        help="Export mode to run (repeatable), defaults to all")
+    parser.add_argument("--baseline", help="Fail if results regress against this json file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative regression against the baseline")
+    parser.add_argument("--save-baseline", help="Write results to this json file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpDir:
+        textureDir = Path(tmpDir) / "textures"
+        textureDir.mkdir()
+        outputDir = Path(tmpDir) / "maps"
+        outputDir.mkdir()
+
+        bpy.context.selected_objects = makeScene(args.faces, args.objects, args.materials, args.entities, textureDir)
+
+        results = {}
+        for name in args.mode or sorted(EXPORT_MODES):
+            results[name] = runMode(name, EXPORT_MODES[name], outputDir, args.repeat)
+            print("{:>14}: {:>8} faces in {:.3f}s, {:>10.0f} faces/s, {:>12} bytes peak".format(
+                name, results[name]["faces"], results[name]["seconds"],
+                results[name]["facesPerSecond"], results[name]["peakMemory"]))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as filePtr:
+            json.dump(results, filePtr, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as filePtr:
+            regressions = findRegressions(results, json.load(filePtr), args.tolerance)
+
+        for regression in regressions:
+            print("REGRESSION {}".format(regression))
+        if len(regressions) > 0:
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,110 @@
+"""Material lookup cost check for nightsMappingTools.
+
+Fills the bpy stand-in with a growing number of textured materials and times
+getFaceMaterial() hits (texture already has a material) and misses (a new
+material gets created), checking that neither grows with the material count:
+
+    python benchmarks/materialRegistryBenchmark.py
+    python benchmarks/materialRegistryBenchmark.py --counts 1000 10000 50000
+
+Also checks that removed and retextured materials are never handed out.
+Exits with status 1 if a check fails or the cost grows more than allowed.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import blenderStandIn
+bpy = blenderStandIn.install()
+import nightsMappingTools
+
+
+def makeMaterials(materialCount):
+    """Fresh bpy.data holding materialCount textured materials, empty registry"""
+    bpy.data = blenderStandIn.makeData()
+    for i in range(materialCount):
+        bpy.data.materials.new("Material{}".format(i), "/textures/texture{}.png".format(i))
+
+    nightsMappingTools.materials_dict.clear()
+    nightsMappingTools.materials_dict_count = -1
+
+    # The first lookup registers the existing materials, once.
+    nightsMappingTools.findExistingMaterial("/textures/texture0.png", False)
+
+def timeLookups(texturePaths):
+    """Microseconds per getFaceMaterial() call"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        startTime = time.perf_counter()
+        for texturePath in texturePaths:
+            nightsMappingTools.getFaceMaterial(texturePath, False, None)
+        elapsed = time.perf_counter() - startTime
+
+    return elapsed * 1000000.0 / len(texturePaths)
+
+def measureCosts(materialCount, lookups):
+    makeMaterials(materialCount)
+    hitPaths = [ "/textures/texture{}.png".format((i * 7919) % materialCount) for i in range(lookups) ]
+    missPaths = [ "/textures/new{}.png".format(i) for i in range(lookups) ]
+
+    hitCost = timeLookups(hitPaths)
+    missCost = timeLookups(missPaths)
+    if len(bpy.data.materials) != materialCount + lookups:
+        raise AssertionError("Hits created materials or misses reused them")
+
+    return hitCost, missCost
+
+def checkStaleEntries():
+    """Return a list of failed checks on removed and retextured materials"""
+    failures = []
+    makeMaterials(16)
+    with contextlib.redirect_stdout(io.StringIO()):
+        removed = nightsMappingTools.getFaceMaterial("/textures/texture3.png", False, None)
+        bpy.data.materials.remove(removed)
+        replacement = nightsMappingTools.getFaceMaterial("/textures/texture3.png", False, None)
+        if replacement.name == "Material3":
+            failures.append("removed material returned")
+
+        retextured = nightsMappingTools.getFaceMaterial("/textures/texture5.png", False, None)
+        retextured.texture_slots[0].texture.image.filepath = "/textures/other.png"
+        if nightsMappingTools.getFaceMaterial("/textures/texture5.png", False, None) is retextured:
+            failures.append("retextured material returned for its old texture")
+        if nightsMappingTools.getFaceMaterial("/textures/other.png", False, None) is not retextured:
+            failures.append("retextured material not found under its new texture")
+
+    return failures
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Check that material lookups don't scale with the material count")
+    parser.add_argument("--counts", type=int, nargs="+", default=[ 1000, 4000, 16000 ],
+                        help="Numbers of existing materials to measure with")
+    parser.add_argument("--lookups", type=int, default=2000, help="Hits and misses timed per count")
+    parser.add_argument("--max-growth", type=float, default=3.0,
+                        help="Allowed cost ratio between the largest and smallest count")
+    args = parser.parse_args(argv)
+
+    failures = checkStaleEntries()
+
+    costs = {}
+    for materialCount in sorted(args.counts):
+        costs[materialCount] = measureCosts(materialCount, args.lookups)
+        print("{:>8} materials: {:8.2f} us/hit, {:8.2f} us/miss".format(materialCount, *costs[materialCount]))
+
+    smallest = costs[min(costs)]
+    largest = costs[max(costs)]
+    for name, small, large in zip(("hit", "miss"), smallest, largest):
+        if large > small * args.max_growth:
+            failures.append("{} cost grew from {:.2f} to {:.2f} us".format(name, small, large))
+
+    for failure in failures:
+        print("FAILED {}".format(failure))
+
+    return 1 if len(failures) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,110 @@
+"""Import and enable time check for nightsMappingTools.
+
+Imports the addon, registers it, loads one icon through getIcon() and
+unregisters it again, timing each step and checking that nothing is loaded
+before it is needed and everything is released afterwards. Uses the bpy
+stand-in by default, or a real headless Blender with --blender:
+
+    python benchmarks/startupBenchmark.py
+    python benchmarks/startupBenchmark.py --blender /path/to/blender
+
+Exits with status 1 if a check fails or a step is slower than allowed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+sys.path.insert(0, REPO_DIR)
+
+RESULT_MARKER = "STARTUP_RESULT "
+
+
+def measureStartup():
+    """Return step timings in milliseconds and a list of failed checks"""
+    failures = []
+    timings = {}
+
+    startTime = time.perf_counter()
+    import nightsMappingTools
+    timings["import"] = (time.perf_counter() - startTime) * 1000.0
+    if nightsMappingTools.icons_dict is not None:
+        failures.append("icons collection created at import time")
+
+    startTime = time.perf_counter()
+    nightsMappingTools.register()
+    timings["register"] = (time.perf_counter() - startTime) * 1000.0
+    if len(nightsMappingTools.icons_dict) != 0:
+        failures.append("icons loaded by register()")
+    if not os.path.isdir(nightsMappingTools.icons_dir):
+        failures.append("icons directory {} not found".format(nightsMappingTools.icons_dir))
+
+    startTime = time.perf_counter()
+    nightsMappingTools.getIcon("arrow_up")
+    nightsMappingTools.getIcon("arrow_up")
+    timings["firstIcon"] = (time.perf_counter() - startTime) * 1000.0
+    if list(nightsMappingTools.icons_dict.keys()) != [ "arrow_up" ]:
+        failures.append("getIcon() didn't load exactly the requested icon")
+
+    startTime = time.perf_counter()
+    nightsMappingTools.unregister()
+    timings["unregister"] = (time.perf_counter() - startTime) * 1000.0
+    if nightsMappingTools.icons_dict is not None:
+        failures.append("icons collection kept after unregister()")
+
+    return timings, failures
+
+def runInBlender(blender):
+    command = [ blender, "-b", "--factory-startup",
+                "--python-exit-code", "1",
+                "--python", os.path.abspath(__file__), "--", "--inside-blender" ]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            universal_newlines=True)
+    for line in result.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            report = json.loads(line[len(RESULT_MARKER):])
+            return report["timings"], report["failures"]
+
+    return {}, [ "blender run failed:\n{}".format(result.stdout) ]
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Time nightsMappingTools import and enable")
+    parser.add_argument("--blender", help="Measure in this Blender executable with -b instead of the stand-in")
+    parser.add_argument("--max-import-ms", type=float, default=50.0, help="Allowed import time")
+    parser.add_argument("--max-register-ms", type=float, default=50.0, help="Allowed register() time")
+    args = parser.parse_args(argv)
+
+    if args.blender:
+        timings, failures = runInBlender(args.blender)
+    else:
+        import blenderStandIn
+        blenderStandIn.install()
+        timings, failures = measureStartup()
+        if len(blenderStandIn.previewCollections) != 0:
+            failures.append("preview collections leaked after unregister()")
+
+    for name, value in timings.items():
+        print("{:>10}: {:8.3f} ms".format(name, value))
+
+    if timings.get("import", 0.0) > args.max_import_ms:
+        failures.append("import took {:.3f} ms".format(timings["import"]))
+    if timings.get("register", 0.0) > args.max_register_ms:
+        failures.append("register() took {:.3f} ms".format(timings["register"]))
+
+    for failure in failures:
+        print("FAILED {}".format(failure))
+
+    return 1 if len(failures) > 0 else 0
+
+if __name__ == "__main__":
+    # Inside Blender our own arguments come after "--".
+    if "--inside-blender" in sys.argv:
+        timings, failures = measureStartup()
+        print(RESULT_MARKER + json.dumps({ "timings" : timings, "failures" : failures }))
+    else:
+        sys.exit(main(sys.argv[1:]))
@@ -5,25 +5,36 @@ import os
 from math import cos, sin, radians
 from random import randint
 
-# For custom icons.
-icons_dict = bpy.utils.previews.new()
+bl_info = {
+	"name": "Nightz Mapper Tools",
+	"category": "UV",
+}
 
-# When using as addon
-#icons_dir = os.path.join(os.path.dirname(__file__), "icons")
+# For custom icons, created in register().
+icons_dict = None
 
-# When using in the editor:
-script_path = bpy.context.space_data.text.filepath
-icons_dir = os.path.join(os.path.dirname(script_path), "icons")
+# Icons are shipped next to this file, resolved in register().
+icons_dir = None
 
-# Keep track of created materials.
+# Keep track of created materials, keyed by (normalized texture path, alpha).
 materials_dict = {}
 
-# Load icons :)
-iconFilenames = [f for f in os.listdir(icons_dir) if os.path.isfile(os.path.join(icons_dir, f))]
-for filename in iconFilenames:
-	icons_dict.load(os.path.splitext(filename)[0], os.path.join(icons_dir, filename), 'IMAGE')
+# Number of materials in bpy.data when materials_dict was last synced.
+materials_dict_count = -1
 
+def getIconsDir():
+	scriptPath = __file__
+	if not os.path.isfile(scriptPath):
+		# When run from the text editor __file__ is "<file>.blend/<text name>".
+		scriptPath = bpy.context.space_data.text.filepath
+		
+	return os.path.join(os.path.dirname(os.path.abspath(scriptPath)), "icons")
+	
+# Load icons on first use :)
 def getIcon(name):
+	if name not in icons_dict:
+		icons_dict.load(name, os.path.join(icons_dir, name + ".png"), 'IMAGE')
+		
 	return icons_dict[name].icon_id
 	
 def getSelectedTexture(op, context):
@@ -47,41 +58,99 @@ def getSelectedObject(op, context):
 		
 	return objs[0]
 	
-# Register existing materials.
-def findExistingMaterial(textureFilename):
+def normalizeTexturePath(textureFilename):
+	path = bpy.path.abspath(textureFilename)
+	return os.path.normcase(os.path.normpath(os.path.abspath(path)))
+
+def getMaterialKey(textureFilename, hasAlpha):
+	return (normalizeTexturePath(textureFilename), bool(hasAlpha))
+
+def getMaterialTexturePath(mat):
+	for texture_slot in mat.texture_slots:
+		if texture_slot == None or not hasattr(texture_slot, 'texture'):
+			continue
+			
+		texture = texture_slot.texture
+		if not hasattr(texture, 'image') or texture.image is None:
+			continue
+			
+		if not hasattr(texture.image, 'filepath') or not texture.image.filepath:
+			continue
+			
+		return bpy.path.abspath(texture.image.filepath, library=texture.image.library)
+		
+	return None
+	
+def getMaterialAlpha(mat):
+	texture_slot = mat.texture_slots[0]
+	if texture_slot is not None:
+		return bool(texture_slot.use_map_alpha)
+		
+	return bool(mat.use_transparency)
+	
+# Register existing materials, once per change of bpy.data.materials.
+def syncMaterialRegistry(force=False):
+	global materials_dict_count
+	if not force and materials_dict_count == len(bpy.data.materials) and not bpy.data.materials.is_updated:
+		return
+		
+	materials_dict.clear()
 	for mat in bpy.data.materials:
-		for texture_slot in mat.texture_slots:
-			if texture_slot == None or not hasattr(texture_slot, 'texture'):
-				continue
-				
-			texture = texture_slot.texture
-			if not hasattr(texture, 'image') or texture.image is None:
-				continue
-				
-			if not hasattr(texture.image, 'filepath') or texture.image.filepath is None:
-				continue
-				
-			if texture.image.filepath == textureFilename:
-				return mat
-				
+		texturePath = getMaterialTexturePath(mat)
+		if texturePath is None:
+			continue
+			
+		# First material wins, matching the old linear scan.
+		materials_dict.setdefault(getMaterialKey(texturePath, getMaterialAlpha(mat)), mat)
+		
+	materials_dict_count = len(bpy.data.materials)
+	
+def isMaterialAlive(mat):
+	# Removed materials raise ReferenceError. Looking them up by name would
+	# scan bpy.data.materials on every hit.
+	try:
+		mat.name
+		return True
+	except ReferenceError:
+		return False
+		
+def isMaterialIndexedAs(mat, key):
+	if not isMaterialAlive(mat):
+		return False
+		
+	# The material's texture or alpha may have changed since it was indexed.
+	texturePath = getMaterialTexturePath(mat)
+	return texturePath is not None and getMaterialKey(texturePath, getMaterialAlpha(mat)) == key
+	
+def findExistingMaterial(textureFilename, hasAlpha):
+	syncMaterialRegistry()
+	
+	key = getMaterialKey(textureFilename, hasAlpha)
+	mat = materials_dict.get(key)
+	if mat is None or isMaterialIndexedAs(mat, key):
+		return mat
+		
+	# Stale entry: the material was removed or now uses another texture, move
+	# or drop just this entry instead of rebuilding the whole registry.
+	del materials_dict[key]
+	if isMaterialAlive(mat):
+		texturePath = getMaterialTexturePath(mat)
+		if texturePath is not None:
+			materials_dict.setdefault(getMaterialKey(texturePath, getMaterialAlpha(mat)), mat)
+			
 	return None
 	
 def getFaceMaterial(textureFilename, hasAlpha, object):
+	global materials_dict_count
 	textureFile = os.path.split(textureFilename)[1]	
 	
-	# Try to find the material in the local list
-	materialName = "FaceMaterial_{}".format(os.path.splitext(textureFile)[0])
-	if materialName in materials_dict:
-		print("Using existing material {}".format(materialName))
-		return materials_dict[ materialName ]
-		
-	existingMaterial = findExistingMaterial(textureFilename)
+	existingMaterial = findExistingMaterial(textureFilename, hasAlpha)
 	if existingMaterial is not None:
-		materials_dict[ materialName ] = existingMaterial
-		print("Registered existing material {} as {} for mapping.".format(existingMaterial.name, materialName))
+		print("Using existing material {}".format(existingMaterial.name))
 		return existingMaterial
 		
 	# Couldn't find material anywhere, register a new one.
+	materialName = "FaceMaterial_{}".format(os.path.splitext(textureFile)[0])
 	newMaterial = bpy.data.materials.new(materialName)
 	newMaterial.use_shadeless = True
 	newMaterial.use_transparency = hasAlpha
@@ -97,8 +166,9 @@ def getFaceMaterial(textureFilename, hasAlpha, object):
 	newMaterial.texture_slots[0].use_map_alpha = hasAlpha
 	newMaterial.texture_slots[0].alpha_factor = 1.0
 		
-	materials_dict[ materialName ] = newMaterial
-	print("Registered new material for mapping: {}".format(materialName))
+	materials_dict[ getMaterialKey(textureFilename, hasAlpha) ] = newMaterial
+	materials_dict_count = len(bpy.data.materials)
+	print("Registered new material for mapping: {}".format(newMaterial.name))
 	return newMaterial
 	
 def doApplyBrowserTextureToFace(hasAlpha, op, context):
@@ -430,6 +500,10 @@ class NightzMapperToolsPanel(bpy.types.Panel):
 		
 
 def register():
+	global icons_dict, icons_dir
+	icons_dict = bpy.utils.previews.new()
+	icons_dir = getIconsDir()
+	
 	bpy.utils.register_class(ApplyTextureFaceOperator)
 	bpy.utils.register_class(ApplyTextureFaceAlphaOperator)
 	bpy.utils.register_class(RotateUVOperator)
@@ -447,6 +521,7 @@ def register():
 
 
 def unregister():
+	global icons_dict, materials_dict_count
 	bpy.utils.unregister_class(ApplyTextureFaceOperator)
 	bpy.utils.unregister_class(ApplyTextureFaceAlphaOperator)
 	bpy.utils.unregister_class(RotateUVOperator)
@@ -461,6 +536,12 @@ def unregister():
 	bpy.utils.unregister_class(MoveUVLeftOperator)
 	bpy.utils.unregister_class(MoveUVRightOperator)
 	bpy.utils.unregister_class(NightzMapperToolsPanel)
+	
+	bpy.utils.previews.remove(icons_dict)
+	icons_dict = None
+	
+	materials_dict.clear()
+	materials_dict_count = -1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+"""Batch export of many .blend files to generic json maps.
+
+Run from a shell with plain python to drive a pool of headless Blender
+workers, one .blend file per worker:
+
+    python nightzBatchExport.py --output-dir build/maps level1.blend level2.blend
+
+Each worker re-runs this script inside Blender, which selects the requested
+groups (or every mesh and entity) and calls the ExportMap operator.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SCRIPT_PATH = Path(os.path.abspath(__file__))
+EXPORTER_PATH = SCRIPT_PATH.parent / "nightzMapExporter.py"
+
+
+def getOutputPath(blendPath, outputDir, chunked):
+    return Path(outputDir) / (Path(blendPath).stem + (".nzmap" if chunked else ".json"))
+
+def getTexturesPath(outputPath):
+    return outputPath.parents[0] / (outputPath.stem + '_Textures')
+
+def getStampPath(outputPath):
+    return outputPath.parents[0] / (outputPath.name + '.stamp')
+
+def getInputsPath(outputPath):
+    return outputPath.parents[0] / (outputPath.name + '.inputs')
+
+def getExportOptions(args):
+    """Options that change the exported map, recorded next to it"""
+    return {
+        "collections" : args.collection,
+        "copyTextures" : not args.no_copy_textures,
+        "profile" : args.profile,
+        "chunked" : args.chunked,
+    }
+
+def isUpToDate(blendPath, outputPath, options):
+    stampPath = getStampPath(outputPath)
+    if not outputPath.exists() or not stampPath.exists():
+        return False
+
+    with stampPath.open() as filePtr:
+        stamp = json.load(filePtr)
+    if stamp.get("options") != options:
+        return False
+
+    # The exporter itself is an input too, a new exporter means new maps. So
+    # are the textures and linked libraries the worker found in the .blend.
+    inputs = [ str(blendPath), str(EXPORTER_PATH) ] + stamp.get("inputs", [])
+    try:
+        inputTime = max(os.path.getmtime(x) for x in inputs)
+    except OSError:
+        return False
+
+    return os.path.getmtime(str(outputPath)) >= inputTime
+
+def getOutputSize(outputPath):
+    size = 0
+    if outputPath.exists():
+        size += outputPath.stat().st_size
+
+    texturesPath = getTexturesPath(outputPath)
+    if texturesPath.is_dir():
+        for texture in texturesPath.iterdir():
+            if texture.is_file():
+                size += texture.stat().st_size
+
+    return size
+
+def exportMap(blendPath, args):
+    outputPath = getOutputPath(blendPath, args.output_dir, args.chunked)
+    options = getExportOptions(args)
+    if not args.force and isUpToDate(blendPath, outputPath, options):
+        return blendPath, "skipped", 0.0, getOutputSize(outputPath), ""
+
+    command = [ args.blender, "-b", str(blendPath),
+                "--python-exit-code", "1",
+                "--python", str(SCRIPT_PATH), "--",
+                "--worker", "--output", str(outputPath) ]
+    for group in args.collection:
+        command += [ "--collection", group ]
+    if args.no_copy_textures:
+        command.append("--no-copy-textures")
+    if args.profile:
+        command.append("--profile")
+    if args.chunked:
+        command.append("--chunked")
+
+    # Never keep a stamp for an output that may be stale or half written.
+    stampPath = getStampPath(outputPath)
+    inputsPath = getInputsPath(outputPath)
+    for path in (stampPath, inputsPath):
+        if path.exists():
+            path.unlink()
+
+    startTime = time.time()
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                universal_newlines=True)
+    except OSError as e:
+        return blendPath, "failed", time.time() - startTime, 0, "Couldn't run {}: {}".format(args.blender, e)
+    elapsed = time.time() - startTime
+
+    if result.returncode != 0 or not outputPath.exists() or not inputsPath.exists():
+        return blendPath, "failed", elapsed, 0, result.stdout
+
+    with inputsPath.open() as filePtr:
+        inputs = json.load(filePtr)
+    inputsPath.unlink()
+
+    with stampPath.open("w") as filePtr:
+        json.dump({ "options" : options, "inputs" : inputs }, filePtr)
+
+    return blendPath, "exported", elapsed, getOutputSize(outputPath), ""
+
+def printSummary(results):
+    nameWidth = max([len(Path(x[0]).name) for x in results] + [3])
+    print("{}  {:>8}  {:>9}  {:>12}".format("Map".ljust(nameWidth), "Status", "Time (s)", "Size (bytes)"))
+    for blendPath, status, elapsed, size, log in results:
+        print("{}  {:>8}  {:>9.2f}  {:>12}".format(Path(blendPath).name.ljust(nameWidth), status, elapsed, size))
+
+    failed = [x for x in results if x[1] == "failed"]
+    for blendPath, status, elapsed, size, log in failed:
+        print("\n--- {} failed ---\n{}".format(blendPath, log))
+
+    print("\n{} exported, {} skipped, {} failed, {:.2f}s total export time".format(
+        len([x for x in results if x[1] == "exported"]),
+        len([x for x in results if x[1] == "skipped"]),
+        len(failed),
+        sum(x[2] for x in results)))
+
+    return len(failed) == 0
+
+def runDriver(argv):
+    parser = argparse.ArgumentParser(description="Export .blend files to generic json maps")
+    parser.add_argument("blendFiles", nargs="+", help=".blend files to export")
+    parser.add_argument("--output-dir", required=True, help="Directory receiving the exported maps")
+    parser.add_argument("--blender", default="blender", help="Blender executable")
+    parser.add_argument("--collection", action="append", default=[],
+                        help="Export only objects in this group/collection (repeatable), defaults to all meshes and entities")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Number of Blender worker processes, defaults to one per core")
+    parser.add_argument("--force", action="store_true",
+                        help="Export even if outputs are up to date (newer than the .blend, the exporter "
+                             "and the textures and libraries it used)")
+    parser.add_argument("--no-copy-textures", action="store_true",
+                        help="Don't copy textures to destination path")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a <map>.profile.json sidecar with per-phase export timings")
+    parser.add_argument("--chunked", action="store_true",
+                        help="Write chunked compressed .nzmap containers instead of json")
+    args = parser.parse_args(argv)
+
+    # Maps are named after the .blend file, two workers must not share an output.
+    stems = [Path(x).stem for x in args.blendFiles]
+    duplicates = sorted(set(x for x in stems if stems.count(x) > 1))
+    if len(duplicates) > 0:
+        parser.error("several .blend files would export to the same map: {}".format(", ".join(duplicates)))
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+
+    # Each thread only waits on its own Blender process.
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        results = list(pool.map(lambda x: exportMap(x, args), args.blendFiles))
+
+    return 0 if printSummary(results) else 1
+
+def getCollectionObjects(name):
+    import bpy
+
+    # Blender 2.7x calls them groups, newer versions collections.
+    groups = getattr(bpy.data, "collections", None) or bpy.data.groups
+    assert name in groups, 'Unknown group/collection "{}"'.format(name)
+    return groups[name].objects
+
+def getBlendInputs():
+    """Files outside the .blend the export depends on: textures and linked libraries"""
+    import bpy
+
+    inputs = set()
+    for image in bpy.data.images:
+        # Packed and generated images live inside the .blend itself.
+        if image.filepath and image.packed_file is None:
+            inputs.add(os.path.normpath(bpy.path.abspath(image.filepath, library=image.library)))
+    for library in bpy.data.libraries:
+        inputs.add(os.path.normpath(bpy.path.abspath(library.filepath)))
+
+    return sorted(inputs)
+
+def runWorker(argv):
+    import bpy
+
+    parser = argparse.ArgumentParser(prog="nightzBatchExport.py (worker)")
+    parser.add_argument("--worker", action="store_true")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--collection", action="append", default=[])
+    parser.add_argument("--no-copy-textures", action="store_true")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--chunked", action="store_true")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(SCRIPT_PATH.parent))
+    import nightzMapExporter
+    nightzMapExporter.register()
+
+    if len(args.collection) > 0:
+        objects = []
+        for name in args.collection:
+            objects += [x for x in getCollectionObjects(name) if x not in objects]
+    else:
+        entityTypes = nightzMapExporter.ENTITY_OBJECT_TYPES
+        objects = [x for x in bpy.context.scene.objects if x.type == 'MESH' or x.type in entityTypes]
+
+    for obj in bpy.context.scene.objects:
+        obj.select = obj in objects
+
+    bpy.ops.export.to_generic_json_map(filepath=args.output,
+                                       copyTextures=not args.no_copy_textures,
+                                       writeProfile=args.profile,
+                                       chunkedFormat=args.chunked)
+
+    # Picked up by the driver and recorded in the output's stamp.
+    with getInputsPath(Path(args.output)).open("w") as filePtr:
+        json.dump(getBlendInputs(), filePtr)
+
+if __name__ == "__main__":
+    # Blender passes our own arguments after "--".
+    if "--" in sys.argv and "--worker" in sys.argv:
+        runWorker(sys.argv[sys.argv.index("--") + 1:])
+    else:
+        sys.exit(runDriver(sys.argv[1:]))
@@ -0,0 +1,110 @@
+"""Stand-in game client for the nightzMapExporter live link.
+
+Connects to the live link server started from Blender, applies every delta
+to an in-memory copy of the map and prints what changed:
+
+    python nightzLiveLinkClient.py --port 7420
+"""
+import argparse
+import socket
+import struct
+import sys
+
+# Must match the LIVE_LINK_MSG_* values in nightzMapExporter.py.
+LIVE_LINK_MSG_COUNTS = 1
+LIVE_LINK_MSG_MATERIALS = 2
+LIVE_LINK_MSG_VERTICES = 3
+LIVE_LINK_MSG_FACES = 4
+LIVE_LINK_MSG_FLAGS = 5
+
+
+class LiveLinkMirror:
+    """In-memory map kept up to date from live link messages"""
+    def __init__(self):
+        self.vertices = []
+        self.faces = []
+        self.flags = []
+        self.materials = []
+
+    def resize(self, items, count, default):
+        del items[count:]
+        items.extend([default] * (count - len(items)))
+
+    def apply(self, msgType, payload):
+        """Apply one message and return a short description of it"""
+        if msgType == LIVE_LINK_MSG_COUNTS:
+            numVertices, numFaces = struct.unpack("!II", payload)
+            self.resize(self.vertices, numVertices, (0.0, 0.0, 0.0))
+            self.resize(self.faces, numFaces, ((), (), 0))
+            self.resize(self.flags, numFaces, 0)
+            return "counts: {} vertices, {} faces".format(numVertices, numFaces)
+
+        if msgType == LIVE_LINK_MSG_MATERIALS:
+            count, = struct.unpack_from("!H", payload)
+            offset = 2
+            texts = []
+            for i in range(count * 2):
+                size, = struct.unpack_from("!H", payload, offset)
+                texts.append(payload[offset + 2:offset + 2 + size].decode("utf-8"))
+                offset += 2 + size
+            # (name, texture) pairs, indexed by the faces' material numbers.
+            self.materials = list(zip(texts[0::2], texts[1::2]))
+            return "materials: {}".format(", ".join("{} ({})".format(*x) for x in self.materials))
+
+        start, count = struct.unpack_from("!II", payload)
+        if msgType == LIVE_LINK_MSG_VERTICES:
+            coords = struct.unpack_from("!{}f".format(count * 3), payload, 8)
+            self.vertices[start:start + count] = [coords[i:i + 3] for i in range(0, len(coords), 3)]
+            return "vertices [{}, {})".format(start, start + count)
+
+        if msgType == LIVE_LINK_MSG_FACES:
+            offset = 8
+            for i in range(count):
+                numIndices, = struct.unpack_from("!B", payload, offset)
+                fmt = "!{}I{}fH".format(numIndices, numIndices * 2)
+                values = struct.unpack_from(fmt, payload, offset + 1)
+                self.faces[start + i] = (values[:numIndices], values[numIndices:-1], values[-1])
+                offset += 1 + struct.calcsize(fmt)
+            return "faces [{}, {})".format(start, start + count)
+
+        if msgType == LIVE_LINK_MSG_FLAGS:
+            self.flags[start:start + count] = struct.unpack_from("!{}I".format(count), payload, 8)
+            return "flags [{}, {})".format(start, start + count)
+
+        return "unknown message type {}".format(msgType)
+
+def receiveExactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if len(chunk) == 0:
+            raise ConnectionError("Live link server closed the connection")
+        data += chunk
+
+    return data
+
+def readMessage(sock):
+    msgType, size = struct.unpack("!BI", receiveExactly(sock, 5))
+    return msgType, receiveExactly(sock, size)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Print live link deltas sent by nightzMapExporter")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7420)
+    args = parser.parse_args(argv)
+
+    mirror = LiveLinkMirror()
+    with socket.create_connection((args.host, args.port)) as sock:
+        try:
+            while True:
+                msgType, payload = readMessage(sock)
+                print("{} ({} bytes)".format(mirror.apply(msgType, payload), len(payload)))
+        except (ConnectionError, KeyboardInterrupt) as e:
+            print(e)
+
+    print("Final map: {} vertices, {} faces, {} materials".format(
+        len(mirror.vertices), len(mirror.faces), len(mirror.materials)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
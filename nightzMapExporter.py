@@ -1,6 +1,8 @@
 import bpy
 import bmesh
+import cProfile
 import ctypes
+import json
 import math
 import mathutils
 import os
@@ -9,6 +11,16 @@ import gpu
 import sys
 import shutil
 import socket
+import struct
+import time
+import tracemalloc
+import zlib
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+from contextlib import contextmanager
 from socket import ntohl
 from socket import ntohs
 from bpy import *
@@ -31,6 +43,139 @@ FLAG_IGNORE_FACE_SIZE = 4
 # Hold BMesh for each mesh.
 globalMeshes = {}
 
+# Non-mesh objects exported to the "entities" section.
+ENTITY_OBJECT_TYPES = ('EMPTY', 'LAMP')
+
+# Chunked map container, see nightzMapReader.py for the reader side.
+# Layout: header ('!4sHI' magic, version, chunk count), then one '!BIQIII'
+# table of contents entry per chunk (kind, index, offset, compressed size,
+# raw size, crc32 of raw data), then the zlib compressed json chunks.
+# Vertex and face chunks hold at most chunkVertices/chunkFaces entries, the
+# header lists the range of chunks of each object.
+MAP_CONTAINER_MAGIC = b"NZMC"
+MAP_CONTAINER_VERSION = 2
+MAP_CONTAINER_HEADER = "!4sHI"
+MAP_CONTAINER_TOC_ENTRY = "!BIQIII"
+
+CHUNK_HEADER = 1
+CHUNK_MATERIALS = 2
+CHUNK_VERTICES = 3
+CHUNK_FACES = 4
+
+def getCustomProperties(obj):
+    properties = {}
+    for key in obj.keys():
+        # Skip _RNA_UI and other blender internals.
+        if key.startswith('_'):
+            continue
+
+        value = obj[key]
+        if hasattr(value, 'to_dict'):
+            value = value.to_dict()
+        elif hasattr(value, 'to_list'):
+            value = value.to_list()
+        properties[key] = value
+
+    return properties
+
+def getMaterialImagePath(material):
+    """Path of the image in the material's first texture slot, or None"""
+    texSlot = material.texture_slots[0]
+    texture = getattr(texSlot, 'texture', None)
+    if texSlot != None and texture != None and hasattr(texture, 'image'):
+        textureImage = texture.image
+        if textureImage.filepath != None:
+            return pathlib.Path(textureImage.filepath)
+
+    return None
+
+class ExportProfiler:
+    """Collect per-phase timings and counters of a single map export"""
+    def __init__(self, enabled, traceMemory=False):
+        self.enabled = enabled
+        self.traceMemory = enabled and traceMemory
+        self.phases = {}
+        self.counts = {}
+        self.profile = None
+        self.startedTracing = False
+        self.peakMemory = None
+        self.peakMemoryMethod = None
+
+    def start(self, captureProfile):
+        if not self.enabled:
+            return
+
+        # tracemalloc slows the export down several times, so phases are
+        # only timed under it when asked to, and the report says so.
+        if self.traceMemory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.startedTracing = True
+            elif hasattr(tracemalloc, 'reset_peak'):
+                # Python < 3.9 can't reset the peak of an already running trace.
+                tracemalloc.reset_peak()
+
+        if captureProfile:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    @contextmanager
+    def phase(self, name):
+        startTime = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - startTime
+
+    def setCount(self, name, value):
+        self.counts[name] = value
+
+    def stop(self):
+        """Turn off tracing and profiling, safe to call more than once"""
+        if self.profile is not None:
+            self.profile.disable()
+
+        if self.startedTracing:
+            self.peakMemory = tracemalloc.get_traced_memory()[1]
+            self.peakMemoryMethod = "tracemalloc"
+            tracemalloc.stop()
+            self.startedTracing = False
+        elif self.traceMemory and tracemalloc.is_tracing():
+            self.peakMemory = tracemalloc.get_traced_memory()[1]
+            self.peakMemoryMethod = "tracemalloc"
+        elif self.enabled and resource is not None:
+            # Peak resident size of the whole process so far, kilobytes on
+            # Linux and bytes on macOS.
+            maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peakMemory = maxRss if sys.platform == "darwin" else maxRss * 1024
+            self.peakMemoryMethod = "ru_maxrss"
+
+    def writeReport(self, mapPath):
+        """Write the json sidecar (and .prof dump) next to mapPath, after stop()"""
+        if not self.enabled:
+            return
+
+        report = {
+            "map" : mapPath.name,
+            "timestamp" : time.time(),
+            "blenderVersion" : bpy.app.version_string,
+            "phases" : self.phases,
+            "totalTime" : sum(self.phases.values()),
+            "counts" : self.counts,
+            "peakMemory" : self.peakMemory,
+            "peakMemoryMethod" : self.peakMemoryMethod,
+            "profile" : None,
+        }
+
+        if self.profile is not None:
+            profilePath = mapPath.parents[0] / (mapPath.stem + '.prof')
+            self.profile.dump_stats(str(profilePath))
+            report["profile"] = profilePath.name
+
+        sidecarPath = mapPath.parents[0] / (mapPath.stem + '.profile.json')
+        with sidecarPath.open("w") as filePtr:
+            json.dump(report, filePtr, indent=2, sort_keys=True)
+
 class ExportMap(bpy.types.Operator):
     """Export selected objects to generic map format in json"""
     bl_idname = "export.to_generic_json_map"
@@ -39,6 +184,30 @@ class ExportMap(bpy.types.Operator):
     copyTextures = bpy.props.BoolProperty(name="Copy textures to destination path",
                                           description="Copy textures to destination path",
                                           default = True)
+    writeProfile = bpy.props.BoolProperty(name="Write export profile",
+                                          description="Write per-phase timings, counts and peak memory to <map>.profile.json",
+                                          default = False)
+    captureProfile = bpy.props.BoolProperty(name="Capture cProfile dump",
+                                            description="Also dump cProfile stats to <map>.prof (needs Write export profile)",
+                                            default = False)
+    traceMemory = bpy.props.BoolProperty(name="Trace Python memory",
+                                         description="Measure peak Python memory with tracemalloc instead of the process peak, slowing down the timed phases (needs Write export profile)",
+                                         default = False)
+    chunkedFormat = bpy.props.BoolProperty(name="Chunked compressed map",
+                                           description="Write a .nzmap container of independently compressed chunks instead of json",
+                                           default = False)
+    compressionLevel = bpy.props.IntProperty(name="Compression level",
+                                             description="zlib compression level of chunked maps",
+                                             default = 6, min = 0, max = 9)
+    entityCellSize = bpy.props.FloatProperty(name="Entity grid cell size",
+                                             description="Size of the spatial grid cells indexing exported entities",
+                                             default = 8.0, min = 0.001)
+    chunkFaces = bpy.props.IntProperty(name="Faces per chunk",
+                                       description="Maximum number of faces in each geometry chunk of chunked maps",
+                                       default = 4096, min = 1)
+    chunkVertices = bpy.props.IntProperty(name="Vertices per chunk",
+                                          description="Maximum number of vertices in each geometry chunk of chunked maps",
+                                          default = 4096, min = 1)
         
     @classmethod
     def poll(cls, context):
@@ -46,7 +215,7 @@ class ExportMap(bpy.types.Operator):
 
     def getFaces(self):
         vertexCount = 0
-        facesData = []
+        objectsFaceData = []
         faceCount = 0
         
         selObjects = bpy.context.selected_objects
@@ -66,6 +235,7 @@ class ExportMap(bpy.types.Operator):
               objMesh.faces.layers.int.new("FaceFlags")
               
             flagsLayer = objMesh.faces.layers.int.get("FaceFlags")
+            facesData = []
 
             # print("Writing obj faces (with {} vertices) starting at vertex index {}".format(len(obj.data.vertices), vertexCount))
             for poly in objMesh.faces:
@@ -95,10 +265,12 @@ class ExportMap(bpy.types.Operator):
                 facesData.append(faceData)
                 faceCount += 1
             
+            objectsFaceData.append((obj.name, facesData))
+
             # Add vertex count of active mesh to increase indices on next object.
             vertexCount += len(obj.data.vertices)
             
-        return faceCount, ", ".join(facesData)
+        return faceCount, objectsFaceData
             
     def getMaterials(self):
         materials = []
@@ -108,17 +280,13 @@ class ExportMap(bpy.types.Operator):
             material = self.materialDict[ matName ]
             texturePath = ""
             
-            texSlot = material.texture_slots[0]
-            texture = getattr(texSlot, 'texture', None)
-            if texSlot != None and texture != None and hasattr(texture, 'image'):
-                textureImage = texture.image
-                if textureImage.filepath != None:
-                    tmpPath = pathlib.Path(textureImage.filepath)
-                    if self.copyTextures:
-                        shutil.copyfile(str(tmpPath), str(self.getTexturesPath() / tmpPath.name))
-                        texturePath = self.getTexturesPath().stem + "/" + tmpPath.name
-                    else:
-                        texturePath = str(tmpPath).replace("\\", "\\\\")
+            tmpPath = getMaterialImagePath(material)
+            if tmpPath is not None:
+                if self.copyTextures:
+                    self.textureCopies.append((tmpPath, self.getTexturesPath() / tmpPath.name))
+                    texturePath = self.getTexturesPath().stem + "/" + tmpPath.name
+                else:
+                    texturePath = str(tmpPath).replace("\\", "\\\\")
                     
             matString = "\"name\" : \"{}\", \"texture\" : \"{}\"".format(matName, texturePath)
             materials.append("{" + matString + " } ")
@@ -126,8 +294,16 @@ class ExportMap(bpy.types.Operator):
             
         return materialCount, ", ".join(materials)
 
+    def copyTextureFiles(self):
+        bytesCopied = 0
+        for sourcePath, destPath in self.textureCopies:
+            shutil.copyfile(str(sourcePath), str(destPath))
+            bytesCopied += destPath.stat().st_size
+
+        return len(self.textureCopies), bytesCopied
+
     def getVertexData(self):
-        vertexData = []
+        objectsVertexData = []
         vertexCount = 0
         
         selObjects = bpy.context.selected_objects
@@ -139,14 +315,17 @@ class ExportMap(bpy.types.Operator):
             objMesh.from_mesh(obj.data)
             objMesh.verts.ensure_lookup_table()
             wsMatrix = obj.matrix_world
+            vertexData = []
             for v in objMesh.verts:
                 transformedVertex = wsMatrix * Vector((v.co[0], v.co[1], v.co[2], 1.0))
                 vertexData.append( transformedVertex[0])
                 vertexData.append(-transformedVertex[1])
                 vertexData.append( transformedVertex[2])
                 vertexCount += 1
+
+            objectsVertexData.append((obj.name, vertexData))
                 
-        return vertexCount, ", ".join(str(x) for x in vertexData)
+        return vertexCount, objectsVertexData
 
     def extractMaterialsUsed(self):
         selObjects = bpy.context.selected_objects
@@ -167,6 +346,130 @@ class ExportMap(bpy.types.Operator):
                 self.materialDict[ material.name ] = material
                 # print("Registered used material \"{}\"".format(material.name))
                 
+    def getEntities(self):
+        entities = []
+        for obj in bpy.context.selected_objects:
+            if obj.type not in ENTITY_OBJECT_TYPES:
+                continue
+
+            # Same handedness flip as vertices, which also flips rotations around x and z.
+            location, rotation, scale = obj.matrix_world.decompose()
+            euler = rotation.to_euler('XYZ')
+            entity = {
+                "id" : len(entities),
+                "name" : obj.name,
+                "type" : obj.type,
+                "position" : [ location[0], -location[1], location[2] ],
+                "rotation" : [ -euler[0], euler[1], -euler[2] ],
+                "scale" : [ scale[0], scale[1], scale[2] ],
+                "properties" : getCustomProperties(obj),
+            }
+
+            if obj.type == 'EMPTY':
+                entity["subtype"] = obj.empty_draw_type
+            elif obj.type == 'LAMP':
+                entity["subtype"] = obj.data.type
+                entity["color"] = list(obj.data.color)
+                entity["energy"] = obj.data.energy
+                entity["distance"] = obj.data.distance
+
+            entities.append(entity)
+
+        return entities
+
+    def getEntityGrid(self, entities):
+        """Map grid cells to the ids of the entities inside them"""
+        cells = {}
+        for entity in entities:
+            cell = tuple(int(math.floor(x / self.entityCellSize)) for x in entity["position"])
+            cells.setdefault(cell, []).append(entity["id"])
+
+        # Keyed by "x,y,z" cell coordinates so the runtime can look cells up directly.
+        return {
+            "cellSize" : self.entityCellSize,
+            "cells" : { "{},{},{}".format(*cell) : ids for cell, ids in sorted(cells.items()) },
+        }
+
+    def writeJsonMap(self, filePath, faceCount, vertexCount, materialCount, materialData, 
+                     objectsVertexData, objectsFaceData, entitiesData, entityGridData):
+        vertexData = ", ".join(", ".join(str(x) for x in data) for name, data in objectsVertexData if len(data) > 0)
+        faceData = ", ".join(", ".join(data) for name, data in objectsFaceData if len(data) > 0)
+
+        # print("Vertex Data:\n {} \n\n".format(vertexData))
+        # print("Face Data:\n {} \n\n".format(faceData))
+        # print("Material Data:\n {} \n\n".format(materialData))
+        
+        with filePath.open("w") as filePtr:
+            filePtr.write("{\n")
+            filePtr.write("  \"numFaces\" : {},\n".format(faceCount))
+            filePtr.write("  \"numVertices\" : {},\n".format(vertexCount))
+            filePtr.write("  \"numMaterials\" : {},\n".format(materialCount))
+            filePtr.write("  \"materials\" : [ {} ],\n".format(materialData))
+            filePtr.write("  \"vertices\" : [ {} ],\n".format(vertexData))
+            filePtr.write("  \"faces\" : [ {} ],\n".format(faceData))
+            filePtr.write("  \"entities\" : [ {} ],\n".format(entitiesData))
+            filePtr.write("  \"entityGrid\" : {}\n".format(entityGridData))
+            filePtr.write("}\n")
+
+    def writeChunkedMap(self, filePath, faceCount, vertexCount, materialCount, materialData, 
+                        objectsVertexData, objectsFaceData, entitiesData, entityGridData):
+        chunks = [ (CHUNK_MATERIALS, 0, "[ {} ]".format(materialData)) ]
+        objects = []
+        firstVertex = 0
+        firstFace = 0
+        vertexChunkIndex = 0
+        faceChunkIndex = 0
+        for (name, vertexData), (faceName, faceData) in zip(objectsVertexData, objectsFaceData):
+            # Split vertices in chunks of at most chunkVertices vertices.
+            objectFirstVerticesChunk = vertexChunkIndex
+            for chunkStart in range(0, len(vertexData), self.chunkVertices * 3):
+                chunkData = vertexData[chunkStart:chunkStart + self.chunkVertices * 3]
+                chunks.append((CHUNK_VERTICES, vertexChunkIndex, 
+                               "{{ \"object\" : {}, \"firstVertex\" : {}, \"vertices\" : [ {} ] }}".format(
+                                   json.dumps(name), firstVertex + chunkStart // 3, ", ".join(str(x) for x in chunkData))))
+                vertexChunkIndex += 1
+
+            # Split faces in sectors of at most chunkFaces faces.
+            objectFirstChunk = faceChunkIndex
+            for sectorStart in range(0, len(faceData), self.chunkFaces):
+                sectorFaces = faceData[sectorStart:sectorStart + self.chunkFaces]
+                chunks.append((CHUNK_FACES, faceChunkIndex, 
+                               "{{ \"object\" : {}, \"firstFace\" : {}, \"faces\" : [ {} ] }}".format(
+                                   json.dumps(name), firstFace + sectorStart, ", ".join(sectorFaces))))
+                faceChunkIndex += 1
+
+            objects.append({ "name" : name,
+                             "firstVertex" : firstVertex, "numVertices" : len(vertexData) // 3,
+                             "firstFace" : firstFace, "numFaces" : len(faceData),
+                             "firstVerticesChunk" : objectFirstVerticesChunk,
+                             "numVerticesChunks" : vertexChunkIndex - objectFirstVerticesChunk,
+                             "firstFacesChunk" : objectFirstChunk, 
+                             "numFacesChunks" : faceChunkIndex - objectFirstChunk })
+            firstVertex += len(vertexData) // 3
+            firstFace += len(faceData)
+
+        header = "{{ \"numFaces\" : {}, \"numVertices\" : {}, \"numMaterials\" : {}, \"chunkFaces\" : {}, \"chunkVertices\" : {}, \"objects\" : {}, \"entities\" : [ {} ], \"entityGrid\" : {} }}".format(
+            faceCount, vertexCount, materialCount, self.chunkFaces, self.chunkVertices, json.dumps(objects), entitiesData, entityGridData)
+        chunks.insert(0, (CHUNK_HEADER, 0, header))
+
+        # Offsets are known once every chunk is compressed.
+        offset = struct.calcsize(MAP_CONTAINER_HEADER) + len(chunks) * struct.calcsize(MAP_CONTAINER_TOC_ENTRY)
+        tocData = []
+        compressedChunks = []
+        for kind, index, data in chunks:
+            rawData = data.encode("utf-8")
+            compressedData = zlib.compress(rawData, self.compressionLevel)
+            tocData.append(struct.pack(MAP_CONTAINER_TOC_ENTRY, kind, index, offset, 
+                                       len(compressedData), len(rawData), zlib.crc32(rawData)))
+            compressedChunks.append(compressedData)
+            offset += len(compressedData)
+
+        with filePath.open("wb") as filePtr:
+            filePtr.write(struct.pack(MAP_CONTAINER_HEADER, MAP_CONTAINER_MAGIC, MAP_CONTAINER_VERSION, len(chunks)))
+            filePtr.write(b"".join(tocData))
+            for compressedData in compressedChunks:
+                filePtr.write(compressedData)
+
     def getTexturesPath(self):
         filePath = Path(self.filepath)
         filePathNoExt = filePath.parents[0] / filePath.stem
@@ -179,76 +482,392 @@ class ExportMap(bpy.types.Operator):
         
     def execute(self, context):
         print("Saving generic map to '{}'...".format(self.filepath))
+        profiler = ExportProfiler(self.writeProfile, self.traceMemory)
+        profiler.start(self.captureProfile)
+        try:
+            filePath = self.exportMap(profiler)
+        finally:
+            # A failed export must not leave tracing or profiling running.
+            profiler.stop()
+
+        profiler.writeReport(filePath)
+        return {'FINISHED'}
+
+    def exportMap(self, profiler):
         self.createTexturePathIfNeeded()
         
         self.materialDict = {}
+        self.textureCopies = []
                 
         # Traverse scene and update meshes.
-        selObjects = bpy.context.selected_objects
-        for obj in selObjects:
-            if obj.type != 'MESH':
-                continue
-                
-            objMesh = obj.data
-            objMesh.update()
-            objMesh.calc_tangents()
-            for f in objMesh.polygons:
-                assert len(f.vertices) == 3 or len(f.vertices) == 4, 'Only triangles and quads are supported'
+        with profiler.phase("validation"):
+            selObjects = bpy.context.selected_objects
+            for obj in selObjects:
+                if obj.type != 'MESH':
+                    continue
+                    
+                objMesh = obj.data
+                objMesh.update()
+                objMesh.calc_tangents()
+                for f in objMesh.polygons:
+                    assert len(f.vertices) == 3 or len(f.vertices) == 4, 'Only triangles and quads are supported'
         
         # Register all materials used by selection.
-        self.extractMaterialsUsed()
+        with profiler.phase("materialExtraction"):
+            self.extractMaterialsUsed()
+            materialCount, materialData = self.getMaterials()
+        
+        with profiler.phase("vertexPass"):
+            vertexCount, objectsVertexData = self.getVertexData()
+        with profiler.phase("facePass"):
+            faceCount, objectsFaceData = self.getFaces()
+        with profiler.phase("textureCopy"):
+            textureCount, textureBytes = self.copyTextureFiles()
+        with profiler.phase("entities"):
+            entities = self.getEntities()
+            entitiesData = ", ".join(json.dumps(x, default=str) for x in entities)
+            entityGridData = json.dumps(self.getEntityGrid(entities))
         
         filePath = Path(self.filepath)
-        with filePath.open("w") as filePtr:
-            vertexCount, vertexData = self.getVertexData()
-            faceCount, faceData = self.getFaces()
-            materialCount, materialData = self.getMaterials()
-            entitiesData = ""
+        with profiler.phase("write"):
+            if self.chunkedFormat:
+                filePath = filePath.with_suffix(".nzmap")
+                self.writeChunkedMap(filePath, faceCount, vertexCount, materialCount, materialData, 
+                                     objectsVertexData, objectsFaceData, entitiesData, entityGridData)
+            else:
+                self.writeJsonMap(filePath, faceCount, vertexCount, materialCount, materialData, 
+                                  objectsVertexData, objectsFaceData, entitiesData, entityGridData)
             
-            # print("Vertex Data:\n {} \n\n".format(vertexData))
-            # print("Face Data:\n {} \n\n".format(faceData))
-            # print("Material Data:\n {} \n\n".format(materialData))
-            
-            filePtr.write("{\n")
-            filePtr.write("  \"numFaces\" : {},\n".format(faceCount))
-            filePtr.write("  \"numVertices\" : {},\n".format(vertexCount))
-            filePtr.write("  \"numMaterials\" : {},\n".format(materialCount))
-            filePtr.write("  \"materials\" : [ {} ],\n".format(materialData))
-            filePtr.write("  \"vertices\" : [ {} ],\n".format(vertexData))
-            filePtr.write("  \"faces\" : [ {} ],\n".format(faceData))
-            filePtr.write("  \"entities\" : [ {} ]\n".format(entitiesData))
-            filePtr.write("}\n")
-            
-            print("Exported {} vertices, {} faces and {} materials".format(vertexCount, faceCount, materialCount))
+        print("Exported {} vertices, {} faces, {} materials and {} entities".format(vertexCount, faceCount, materialCount, len(entities)))
 
-        return {'FINISHED'}
+        profiler.setCount("vertices", vertexCount)
+        profiler.setCount("faces", faceCount)
+        profiler.setCount("materials", materialCount)
+        profiler.setCount("entities", len(entities))
+        profiler.setCount("texturesCopied", textureCount)
+        profiler.setCount("textureBytes", textureBytes)
+        profiler.setCount("mapBytes", filePath.stat().st_size)
+        return filePath
 
     def invoke(self, context, event):
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
 
+# Live link message types, see nightzLiveLinkClient.py for the reader side.
+# Every message is a '!BI' header (type, payload size) followed by the payload.
+LIVE_LINK_MSG_COUNTS = 1
+LIVE_LINK_MSG_MATERIALS = 2
+LIVE_LINK_MSG_VERTICES = 3
+LIVE_LINK_MSG_FACES = 4
+LIVE_LINK_MSG_FLAGS = 5
+
+# Changed entries closer than this are sent as a single range.
+LIVE_LINK_MERGE_GAP = 16
+
+# Clients this far behind on reading are dropped rather than queued forever.
+LIVE_LINK_MAX_PENDING = 64 * 1024 * 1024
+
+# Running live link server, if any.
+liveLinkServer = None
+
+def packLiveLinkMessage(msgType, payload):
+    return struct.pack("!BI", msgType, len(payload)) + payload
+
+def getChangedRanges(oldItems, newItems, mergeGap=LIVE_LINK_MERGE_GAP):
+    """Return [start, end) ranges of newItems that differ from oldItems"""
+    ranges = []
+    for i in range(len(newItems)):
+        if i < len(oldItems) and oldItems[i] == newItems[i]:
+            continue
+
+        if len(ranges) > 0 and i - ranges[-1][1] <= mergeGap:
+            ranges[-1][1] = i + 1
+        else:
+            ranges.append([i, i + 1])
+
+    return ranges
+
+def buildLiveLinkSnapshot(objects):
+    """Same vertex/face ordering as ExportMap, flattened for diffing"""
+    vertices = []
+    faces = []
+    flags = []
+    # Material name -> texture path, as a json export without texture copies writes it.
+    materialTextures = {}
+    for obj in objects:
+        if obj.type != 'MESH' or obj.data.uv_layers.active is None:
+            continue
+
+        if obj.mode == 'EDIT':
+            obj.update_from_editmode()
+
+        objData = obj.data
+        vertexOffset = len(vertices)
+        wsMatrix = obj.matrix_world
+        for v in objData.vertices:
+            transformedVertex = wsMatrix * Vector((v.co[0], v.co[1], v.co[2], 1.0))
+            vertices.append((transformedVertex[0], -transformedVertex[1], transformedVertex[2]))
+
+        uvLayer = objData.uv_layers.active.data
+        flagsLayer = objData.polygon_layers_int.get("FaceFlags")
+        for poly in objData.polygons:
+            indices = tuple(poly.vertices)
+            uvs = tuple(c for x in indices for c in uvLayer[x].uv)
+            material = objData.materials[poly.material_index]
+            faces.append((tuple(x + vertexOffset for x in indices), uvs, material.name))
+            flags.append(flagsLayer.data[poly.index].value if flagsLayer is not None else 0)
+            if material.name not in materialTextures:
+                imagePath = getMaterialImagePath(material)
+                materialTextures[material.name] = str(imagePath) if imagePath is not None else ""
+
+    return vertices, faces, flags, materialTextures
+
+class LiveLinkServer:
+    """Push incremental map deltas to connected game clients over TCP"""
+    def __init__(self, port, debounce):
+        self.debounce = debounce
+        # Client socket -> bytes queued but not yet sent to it.
+        self.clients = {}
+        self.selection = ()
+        self.snapshot = ([], [], [], {})
+        # Material names in the order clients index them, and their textures.
+        self.materials = []
+        self.materialTextures = {}
+        self.dirty = False
+        self.lastChangeTime = 0.0
+
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(("127.0.0.1", port))
+        self.listener.listen(4)
+        self.listener.setblocking(False)
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+        self.clients = {}
+        self.listener.close()
+
+    def markDirty(self):
+        self.dirty = True
+        self.lastChangeTime = time.time()
+
+    def acceptClients(self):
+        newClients = []
+        while True:
+            try:
+                client, address = self.listener.accept()
+            except BlockingIOError:
+                break
+
+            # Never block Blender's UI thread on a slow client.
+            client.setblocking(False)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            print("Live link client connected from {}".format(address))
+            newClients.append(client)
+
+        return newClients
+
+    def encodeDeltas(self, oldSnapshot, newSnapshot, oldMaterials, oldMaterialTextures):
+        oldVertices, oldFaces, oldFlags, _ = oldSnapshot
+        vertices, faces, flags, _ = newSnapshot
+        messages = []
+
+        if len(oldVertices) != len(vertices) or len(oldFaces) != len(faces):
+            messages.append(packLiveLinkMessage(LIVE_LINK_MSG_COUNTS,
+                                                struct.pack("!II", len(vertices), len(faces))))
+
+        if oldMaterials != self.materials or oldMaterialTextures != self.materialTextures:
+            payload = [ struct.pack("!H", len(self.materials)) ]
+            for name in self.materials:
+                for text in (name, self.materialTextures[name]):
+                    encodedText = text.encode("utf-8")
+                    payload.append(struct.pack("!H", len(encodedText)) + encodedText)
+            messages.append(packLiveLinkMessage(LIVE_LINK_MSG_MATERIALS, b"".join(payload)))
+
+        for start, end in getChangedRanges(oldVertices, vertices):
+            coords = [c for v in vertices[start:end] for c in v]
+            payload = struct.pack("!II{}f".format(len(coords)), start, end - start, *coords)
+            messages.append(packLiveLinkMessage(LIVE_LINK_MSG_VERTICES, payload))
+
+        materialIndices = { name : i for i, name in enumerate(self.materials) }
+        for start, end in getChangedRanges(oldFaces, faces):
+            payload = [ struct.pack("!II", start, end - start) ]
+            for indices, uvs, materialName in faces[start:end]:
+                payload.append(struct.pack("!B{}I{}fH".format(len(indices), len(uvs)),
+                                           len(indices), *(indices + uvs + (materialIndices[materialName],))))
+            messages.append(packLiveLinkMessage(LIVE_LINK_MSG_FACES, b"".join(payload)))
+
+        for start, end in getChangedRanges(oldFlags, flags):
+            payload = struct.pack("!II{}I".format(end - start), start, end - start, *flags[start:end])
+            messages.append(packLiveLinkMessage(LIVE_LINK_MSG_FLAGS, payload))
+
+        return b"".join(messages)
+
+    def dropClient(self, client, reason):
+        print("Live link client {}".format(reason))
+        client.close()
+        del self.clients[client]
+
+    def queue(self, clients, data):
+        for client in clients:
+            self.clients[client] += data
+            if len(self.clients[client]) > LIVE_LINK_MAX_PENDING:
+                self.dropClient(client, "dropped, too far behind")
+
+    def flush(self):
+        """Send whatever each client can take right now"""
+        for client, pending in list(self.clients.items()):
+            # Clients don't talk back, so a readable socket means it was closed.
+            try:
+                if len(client.recv(4096)) == 0:
+                    self.dropClient(client, "disconnected")
+                    continue
+            except BlockingIOError:
+                pass
+            except OSError:
+                self.dropClient(client, "disconnected")
+                continue
+
+            if len(pending) == 0:
+                continue
+
+            try:
+                sent = client.send(pending)
+            except BlockingIOError:
+                continue
+            except OSError:
+                self.dropClient(client, "disconnected")
+                continue
+
+            del pending[:sent]
+
+    def setSelection(self, objects):
+        selection = tuple(x.name for x in objects)
+        if selection != self.selection:
+            self.selection = selection
+            self.markDirty()
+
+    def update(self, objects):
+        self.setSelection(objects)
+        newClients = self.acceptClients()
+        self.flush()
+
+        # Wait for edits to settle, so a drag only sends its final state.
+        settled = self.dirty and time.time() - self.lastChangeTime >= self.debounce
+        if not settled and len(newClients) == 0:
+            return
+
+        oldSnapshot, oldMaterials, oldMaterialTextures = self.snapshot, self.materials, self.materialTextures
+        self.snapshot = buildLiveLinkSnapshot(objects)
+        # Only append materials, so indices of already sent faces stay valid.
+        usedMaterials = self.snapshot[3]
+        self.materials = oldMaterials + sorted(set(usedMaterials).difference(oldMaterials))
+        self.materialTextures = dict(oldMaterialTextures, **usedMaterials)
+        self.dirty = False
+
+        if len(self.clients) > 0:
+            self.queue(list(self.clients), self.encodeDeltas(oldSnapshot, self.snapshot,
+                                                             oldMaterials, oldMaterialTextures))
+
+        # New clients get everything, as a delta from an empty map.
+        if len(newClients) > 0:
+            for client in newClients:
+                self.clients[client] = bytearray()
+            self.queue(newClients, self.encodeDeltas(([], [], [], {}), self.snapshot, [], {}))
+
+        self.flush()
+
+@persistent
+def liveLinkHandler(scene):
+    if liveLinkServer is None:
+        return None
+
+    objects = [x for x in bpy.context.selected_objects if x.type == 'MESH']
+    if any(x.is_updated or x.is_updated_data for x in objects):
+        liveLinkServer.markDirty()
+    # Material edits, such as swapping the texture, don't tag the objects using them.
+    elif bpy.data.materials.is_updated or bpy.data.textures.is_updated:
+        liveLinkServer.markDirty()
+
+    liveLinkServer.update(objects)
+    return None
+
+def markLiveLinkDirty():
+    if liveLinkServer is not None:
+        liveLinkServer.markDirty()
+
+def stopLiveLink():
+    global liveLinkServer
+    if liveLinkServer is None:
+        return
+
+    if liveLinkHandler in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.remove(liveLinkHandler)
+    liveLinkServer.close()
+    liveLinkServer = None
+
+class LiveLinkMap(bpy.types.Operator):
+    """Start or stop pushing selected objects' changes to a running game"""
+    bl_idname = "export.generic_map_live_link"
+    bl_label = "Toggle Generic Map Live Link"
+    port = bpy.props.IntProperty(name="Port",
+                                 description="Local TCP port game clients connect to",
+                                 default = 7420, min = 1, max = 65535)
+    debounce = bpy.props.FloatProperty(name="Debounce",
+                                       description="Seconds without edits before changes are sent",
+                                       default = 0.25, min = 0.0)
+
+    def execute(self, context):
+        global liveLinkServer
+        if liveLinkServer is not None:
+            stopLiveLink()
+            self.report({'INFO'}, "Live link stopped")
+            return {'FINISHED'}
+
+        try:
+            liveLinkServer = LiveLinkServer(self.port, self.debounce)
+        except OSError as e:
+            self.report({'ERROR'}, "Couldn't start live link on port {}: {}".format(self.port, e))
+            return {'CANCELLED'}
+
+        bpy.app.handlers.scene_update_post.append(liveLinkHandler)
+        self.report({'INFO'}, "Live link listening on port {}".format(self.port))
+        return {'FINISHED'}
+
+
 # Only needed if you want to add into a dynamic menu
 def menu_func(self, context):
     self.layout.operator_context = 'INVOKE_DEFAULT'
     self.layout.operator(ExportMap.bl_idname,
                          text="Export to Generic Map JSON")
+    self.layout.operator(LiveLinkMap.bl_idname,
+                         text="Generic Map Live Link (start/stop)")
 
 def setDithering(self, context):
     editObject = context.edit_object
     bm = globalMeshes.setdefault(editObject.name, 
                                  bmesh.from_edit_mesh(editObject.data))
 
+    changed = False
     for face in bm.faces:
       if face.select == False:
         continue
 
       layer = bm.faces.layers.int.get("FaceFlags")
+      oldFlags = face[layer]
       if bpy.context.window_manager.useDithering:
         face[layer] |= FLAG_DITHERING
       else:
         face[layer] &= ~FLAG_DITHERING
+      changed = changed or face[layer] != oldFlags
 
+    # Tag the mesh as changed, flags only live in the edit BMesh layer. Only on
+    # real changes, updateWMValues() sets these properties on every scene update.
+    if changed:
+      bmesh.update_edit_mesh(editObject.data, False, False)
+      markLiveLinkDirty()
     return None
 
 def setTransparency(self, context):
@@ -256,16 +875,24 @@ def setTransparency(self, context):
     bm = globalMeshes.setdefault(editObject.name, 
                                  bmesh.from_edit_mesh(editObject.data))
 
+    changed = False
     for face in bm.faces:
       if face.select == False:
         continue
 
       layer = bm.faces.layers.int.get("FaceFlags")
+      oldFlags = face[layer]
       if bpy.context.window_manager.useTransparency:
         face[layer] |= FLAG_TRANSPARENCY
       else:
         face[layer] &= ~FLAG_TRANSPARENCY
+      changed = changed or face[layer] != oldFlags
 
+    # Tag the mesh as changed, flags only live in the edit BMesh layer. Only on
+    # real changes, updateWMValues() sets these properties on every scene update.
+    if changed:
+      bmesh.update_edit_mesh(editObject.data, False, False)
+      markLiveLinkDirty()
     return None
 
 def setIgnoreFaceSize(self, context):
@@ -273,16 +900,24 @@ def setIgnoreFaceSize(self, context):
     bm = globalMeshes.setdefault(editObject.name, 
                                  bmesh.from_edit_mesh(editObject.data))
 
+    changed = False
     for face in bm.faces:
       if face.select == False:
         continue
 
       layer = bm.faces.layers.int.get("FaceFlags")
+      oldFlags = face[layer]
       if bpy.context.window_manager.ignoreFaceSize:
         face[layer] |= FLAG_IGNORE_FACE_SIZE
       else:
         face[layer] &= ~FLAG_IGNORE_FACE_SIZE
+      changed = changed or face[layer] != oldFlags
 
+    # Tag the mesh as changed, flags only live in the edit BMesh layer. Only on
+    # real changes, updateWMValues() sets these properties on every scene update.
+    if changed:
+      bmesh.update_edit_mesh(editObject.data, False, False)
+      markLiveLinkDirty()
     return None
 
 # Store intermediate values for face flags.
@@ -360,6 +995,7 @@ class MapEditPanel(bpy.types.Panel):
 
 def register():
   bpy.utils.register_class(ExportMap)
+  bpy.utils.register_class(LiveLinkMap)
   bpy.utils.register_class(MapEditPanel)
   bpy.types.INFO_MT_file_export.append(menu_func)
 
@@ -368,7 +1004,9 @@ def register():
   bpy.app.handlers.scene_update_post.append(editObjectChangeHandler)
 
 def unregister():
+  stopLiveLink()
   bpy.utils.unregister_class(ExportMap)
+  bpy.utils.unregister_class(LiveLinkMap)
   bpy.utils.unregister_class(MapEditPanel)
 
   bpy.types.INFO_MT_file_export.remove(menu_func)
@@ -0,0 +1,137 @@
+"""Reader for chunked .nzmap containers written by nightzMapExporter.
+
+Lists the table of contents, and optionally checks that the container holds
+the same map as a json export of the same selection:
+
+    python nightzMapReader.py level1.nzmap
+    python nightzMapReader.py level1.nzmap --compare level1.json
+"""
+import argparse
+import json
+import struct
+import sys
+import zlib
+
+# Must match the MAP_CONTAINER_* and CHUNK_* values in nightzMapExporter.py.
+MAP_CONTAINER_MAGIC = b"NZMC"
+MAP_CONTAINER_VERSION = 2
+MAP_CONTAINER_HEADER = "!4sHI"
+MAP_CONTAINER_TOC_ENTRY = "!BIQIII"
+
+CHUNK_HEADER = 1
+CHUNK_MATERIALS = 2
+CHUNK_VERTICES = 3
+CHUNK_FACES = 4
+
+CHUNK_NAMES = {
+    CHUNK_HEADER : "header",
+    CHUNK_MATERIALS : "materials",
+    CHUNK_VERTICES : "vertices",
+    CHUNK_FACES : "faces",
+}
+
+
+class MapContainer:
+    """Random access to the chunks of a .nzmap file, only reading what is asked for"""
+    def __init__(self, path):
+        self.filePtr = open(path, "rb")
+
+        headerSize = struct.calcsize(MAP_CONTAINER_HEADER)
+        magic, version, chunkCount = struct.unpack(MAP_CONTAINER_HEADER, self.filePtr.read(headerSize))
+        if magic != MAP_CONTAINER_MAGIC:
+            raise ValueError("{} is not a chunked map".format(path))
+        if version != MAP_CONTAINER_VERSION:
+            raise ValueError("Unsupported chunked map version {}".format(version))
+
+        entrySize = struct.calcsize(MAP_CONTAINER_TOC_ENTRY)
+        tocData = self.filePtr.read(entrySize * chunkCount)
+        self.toc = [ struct.unpack_from(MAP_CONTAINER_TOC_ENTRY, tocData, i * entrySize)
+                     for i in range(chunkCount) ]
+        self.index = { (entry[0], entry[1]) : entry for entry in self.toc }
+
+    def close(self):
+        self.filePtr.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def readChunk(self, kind, index=0):
+        kind, index, offset, compressedSize, rawSize, crc = self.index[(kind, index)]
+        self.filePtr.seek(offset)
+        rawData = zlib.decompress(self.filePtr.read(compressedSize))
+        if len(rawData) != rawSize or zlib.crc32(rawData) != crc:
+            raise ValueError("Corrupted {} chunk {}".format(CHUNK_NAMES[kind], index))
+
+        return json.loads(rawData.decode("utf-8"))
+
+    def readHeader(self):
+        return self.readChunk(CHUNK_HEADER)
+
+    def readObjectVertices(self, objectInfo):
+        """Flat vertex coordinates of one object, reading only that object's vertex chunks"""
+        vertices = []
+        for i in range(objectInfo["numVerticesChunks"]):
+            vertices += self.readChunk(CHUNK_VERTICES, objectInfo["firstVerticesChunk"] + i)["vertices"]
+
+        return vertices
+
+    def readObjectFaces(self, objectInfo):
+        """Faces of one object, reading only that object's face chunks"""
+        faces = []
+        for i in range(objectInfo["numFacesChunks"]):
+            faces += self.readChunk(CHUNK_FACES, objectInfo["firstFacesChunk"] + i)["faces"]
+
+        return faces
+
+    def loadMap(self):
+        """Read every chunk back into the layout of a json map"""
+        header = self.readHeader()
+        vertices = []
+        faces = []
+        for objectInfo in header["objects"]:
+            vertices += self.readObjectVertices(objectInfo)
+            faces += self.readObjectFaces(objectInfo)
+
+        return {
+            "numFaces" : header["numFaces"],
+            "numVertices" : header["numVertices"],
+            "numMaterials" : header["numMaterials"],
+            "materials" : self.readChunk(CHUNK_MATERIALS),
+            "vertices" : vertices,
+            "faces" : faces,
+            "entities" : header["entities"],
+            "entityGrid" : header["entityGrid"],
+        }
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Inspect and verify chunked .nzmap files")
+    parser.add_argument("container", help=".nzmap file to read")
+    parser.add_argument("--compare", help="json map the container must match")
+    args = parser.parse_args(argv)
+
+    with MapContainer(args.container) as container:
+        print("{:>10}  {:>6}  {:>10}  {:>10}  {:>10}".format("Chunk", "Index", "Offset", "Compressed", "Raw"))
+        for kind, index, offset, compressedSize, rawSize, crc in container.toc:
+            print("{:>10}  {:>6}  {:>10}  {:>10}  {:>10}".format(
+                CHUNK_NAMES.get(kind, kind), index, offset, compressedSize, rawSize))
+
+        loadedMap = container.loadMap()
+
+    if args.compare:
+        with open(args.compare) as filePtr:
+            expectedMap = json.load(filePtr)
+
+        mismatches = [key for key in expectedMap if expectedMap[key] != loadedMap.get(key)]
+        if len(mismatches) > 0:
+            print("Container differs from {} in: {}".format(args.compare, ", ".join(mismatches)))
+            return 1
+
+        print("Container matches {}".format(args.compare))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))